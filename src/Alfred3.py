@@ -258,7 +258,8 @@ class Tools(object):
 
             (str): Env value or string if not available
         """
-        return os.getenv(var) if os.getenv(var) is not None else default
+        value = os.getenv(var)
+        return value if value is not None else default
 
     @staticmethod
     def getEnvBool(var: str, default: bool = False) -> bool:
@@ -276,13 +277,14 @@ class Tools(object):
 
             bool: True or False as bool
         """
+        value = os.getenv(var)
         try:
-            if os.getenv(var).isdigit():
-                if os.getenv(var) == '0':
+            if value.isdigit():
+                if value == '0':
                     return False
                 else:
                     return True
-            if os.getenv(var).lower() == "true":
+            if value.lower() == "true":
                 return True
             else:
                 return default
@@ -17,18 +17,21 @@ class Icons(object):
 
     """
 
-    def __init__(self, histories: list) -> None:
+    def __init__(self, histories: list, url_idx: int = 0, pool=None) -> None:
         """
         Heat cache of favicon files
 
         Args:
 
             histories (list): Hiosty object with URL, NAME, addtional.
+            url_idx (int, optional): Position of the URL in each entry. Defaults to 0.
+            pool (multiprocessing.Pool, optional): Shared pool for the downloads. Defaults to a new pool.
 
         """
         self.wf_cache_dir = Tools.getCacheDir()
         self.histories = histories
-        self._cache_controller()
+        self.url_idx = url_idx
+        self._cache_controller(pool)
 
     def get_favion_path(self, url: str) -> str:
         """
@@ -40,7 +43,35 @@ class Icons(object):
         Returns:
             str: Full path to img (PNG) file
         """
-        netloc = urlparse(url).netloc
+        return self._netloc_favicon_path(urlparse(url).netloc)
+
+    def as_dict(self) -> dict:
+        """
+        Returns fav ico image (PNG) file paths of all entries
+
+        Returns:
+            dict: URL to full path of img (PNG) file or None
+        """
+        netloc_paths = dict()
+        paths = dict()
+        for i in self.histories:
+            url = i[self.url_idx]
+            netloc = urlparse(url).netloc
+            if netloc not in netloc_paths:
+                netloc_paths[netloc] = self._netloc_favicon_path(netloc)
+            paths[url] = netloc_paths[netloc]
+        return paths
+
+    def _netloc_favicon_path(self, netloc: str) -> str:
+        """
+        Returns cached fav ico image (PNG) file path of a domain
+
+        Args:
+            netloc (str): Network location e.g. http://www.google.com = www.google.com
+
+        Returns:
+            str: Full path to img (PNG) file
+        """
         img = os.path.join(self.wf_cache_dir, f"{netloc}.png")
         if not (os.path.exists(img)):
             img = None
@@ -69,15 +100,16 @@ class Icons(object):
                     except urllib.error.HTTPError as e:
                         os.path.exists(img) and os.remove(img)
 
-    def _cache_controller(self) -> None:
+    def _cache_controller(self, pool=None) -> None:
         """
         Cache Controller to heat up cache and invalidation
 
         Args:
-            histories (list): List with history entries
+            pool (multiprocessing.Pool, optional): Shared pool for the downloads. Defaults to a new pool.
         """
-        domains = [urlparse(i[0]).netloc for i in self.histories]
-        pool = multiprocessing.Pool()
+        domains = [urlparse(i[self.url_idx]).netloc for i in self.histories]
+        # Not stored on self, pools cannot be pickled along with _cache_favicon
+        pool = pool or multiprocessing.Pool()
         pool.map(self._cache_favicon, domains)
 
     def _cleanup_img_cache(self, number_of_days: int, f_path: str) -> None:
@@ -6,13 +6,105 @@ Avatar generator module for browser profiles.
 Generates circular avatar images with the first letter of a profile name
 and a color background when no custom profile image is available.
 
-Uses PIL (Pillow) from system Python for PNG generation with transparency.
+Uses PIL (Pillow) in-process for PNG generation with transparency and
+falls back to a plain SVG file when Pillow is not installed.
 """
 
-import hashlib
+import io
 import os
-import subprocess
-import sys
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterable, Tuple
+from xml.sax.saxutils import escape
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:
+    Image = ImageDraw = ImageFont = None
+
+
+FONT_PATHS = [
+    "/System/Library/Fonts/Helvetica.ttc",
+    "/System/Library/Fonts/SF-Pro.ttf",
+    "/Library/Fonts/Arial.ttf",
+]
+
+# Resolved once at import time, the first existing font file
+FONT_PATH = next((p for p in FONT_PATHS if os.path.exists(p)), None)
+
+# Single-line SVG avatar, filled in with str.format_map
+_SVG_TEMPLATE = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" '
+    'viewBox="0 0 {size} {size}"><circle cx="{half}" cy="{half}" r="{half}" '
+    'fill="{bg}"/><text x="50%" y="50%" dy=".35em" text-anchor="middle" '
+    'font-family="Helvetica, Arial, sans-serif" font-size="{fs}" '
+    'fill="#ffffff">{letter}</text></svg>'
+)
+
+# Avatar paths known to exist on disk in this process
+_known_avatars = set()
+
+# Directories already created in this process
+_dirs_ensured = set()
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    """
+    Write data to a temporary file and rename it into place, so concurrent
+    readers never see a partially written file.
+
+    Args:
+        path (str): Destination file path
+        data (bytes): File content
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _ensure_dir(path: str) -> None:
+    """
+    Create a directory once per process, skipping the makedirs call afterwards.
+
+    Args:
+        path (str): Directory path
+    """
+    if path and path not in _dirs_ensured:
+        os.makedirs(path, exist_ok=True)
+        _dirs_ensured.add(path)
+
+
+@lru_cache(maxsize=256)
+def get_rgb_from_name(name: str) -> Tuple[int, int, int]:
+    """
+    Generate a consistent RGB color for a given name using hash.
+
+    Args:
+        name (str): Profile name
+
+    Returns:
+        Tuple[int, int, int]: RGB color tuple
+    """
+    # Use a stable checksum (not hash(), which is salted per process)
+    # to generate consistent color for the same name
+    hash_value = zlib.crc32(name.encode("utf-8"))
+
+    # Generate pleasant colors (avoid too dark or too bright)
+    r = ((hash_value >> 16) & 0xFF) % 180 + 50  # 50-230
+    g = ((hash_value >> 8) & 0xFF) % 180 + 50   # 50-230
+    b = (hash_value & 0xFF) % 180 + 50          # 50-230
+
+    return r, g, b
 
 
 def get_color_from_name(name: str) -> str:
@@ -25,15 +117,42 @@ def get_color_from_name(name: str) -> str:
     Returns:
         str: Hex color string
     """
-    # Use hash to generate consistent color for the same name
-    hash_value = int(hashlib.md5(name.encode()).hexdigest()[:6], 16)
+    return "#%02x%02x%02x" % get_rgb_from_name(name)
 
-    # Generate pleasant colors (avoid too dark or too bright)
-    r = (hash_value >> 16) % 180 + 50  # 50-230
-    g = (hash_value >> 8) % 180 + 50   # 50-230
-    b = hash_value % 180 + 50           # 50-230
 
-    return f"#{r:02x}{g:02x}{b:02x}"
+@lru_cache(maxsize=32)
+def _load_font(font_size: int):
+    """
+    Load the avatar font for a size, resolved only once per size.
+
+    Args:
+        font_size (int): Font size in pixels
+
+    Returns:
+        ImageFont: TrueType font or PIL's default font as fallback
+    """
+    if FONT_PATH:
+        try:
+            return ImageFont.truetype(FONT_PATH, font_size)
+        except OSError:
+            pass
+    return ImageFont.load_default()
+
+
+@lru_cache(maxsize=8)
+def _circle_mask(size: int):
+    """
+    Antialiased circle mask, drawn at 2x and downscaled once per size.
+
+    Args:
+        size (int): Size of the mask in pixels
+
+    Returns:
+        Image: 'L' mode mask with the circle in white
+    """
+    mask = Image.new('L', (size * 2, size * 2), 0)
+    ImageDraw.Draw(mask).ellipse([0, 0, size * 2, size * 2], fill=255)
+    return mask.resize((size, size), Image.LANCZOS)
 
 
 def generate_avatar_png(name: str, output_path: str, size: int = 256) -> str:
@@ -48,112 +167,101 @@ def generate_avatar_png(name: str, output_path: str, size: int = 256) -> str:
     Returns:
         str: Path to the generated avatar PNG file, or None if failed
     """
-    # Get color for this name (hex format)
-    bg_color_hex = get_color_from_name(name)
-
-    # Convert hex to RGB tuple
-    bg_color = tuple(int(bg_color_hex[i:i+2], 16) for i in (1, 3, 5))
+    # Get color for this name as RGB tuple
+    bg_color = get_rgb_from_name(name)
 
     # Get first letter (uppercase)
     letter = name[0].upper() if name else "?"
 
     # Ensure output directory exists
-    output_dir = os.path.dirname(output_path)
-    if output_dir:
-        os.makedirs(output_dir, exist_ok=True)
-
-    # Create a Python script to generate the PNG with PIL
-    # This ensures we use a Python that has PIL installed
-    script = f'''
-import sys
-try:
-    from PIL import Image, ImageDraw, ImageFont
-except ImportError:
-    sys.exit(1)
+    _ensure_dir(os.path.dirname(output_path))
 
-size = {size}
-bg_color = {bg_color}
-letter = "{letter}"
-output_path = "{output_path}"
+    if Image is None:
+        return None
 
-# Create image with transparent background
-img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
-draw = ImageDraw.Draw(img)
+    try:
+        # Create image with transparent background and paste the
+        # colored circle through the cached mask
+        img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+        img.paste(Image.new('RGBA', (size, size), bg_color + (255,)), (0, 0), _circle_mask(size))
+        draw = ImageDraw.Draw(img)
 
-# Draw circle
-draw.ellipse([0, 0, size, size], fill=bg_color)
+        font_size = int(size * 0.5)
+        font = _load_font(font_size)
 
-# Font size
-font_size = int(size * 0.5)
+        # Calculate text position to center it
+        try:
+            bbox = draw.textbbox((0, 0), letter, font=font)
+            text_width = bbox[2] - bbox[0]
+            text_height = bbox[3] - bbox[1]
+        except Exception:
+            text_width = font_size * 0.6
+            text_height = font_size
+
+        text_x = (size - text_width) / 2
+        text_y = (size - text_height) / 2
+
+        # Draw text in white
+        draw.text((text_x, text_y), letter, fill=(255, 255, 255, 255), font=font)
+
+        buf = io.BytesIO()
+        img.save(buf, 'PNG', compress_level=1, optimize=False)
+        _write_atomic(output_path, buf.getvalue())
+    except Exception:
+        return None
 
-# Try to load a font
-font = None
-try:
-    import os
-    font_paths = [
-        "/System/Library/Fonts/Helvetica.ttc",
-        "/System/Library/Fonts/SF-Pro.ttf",
-        "/Library/Fonts/Arial.ttf",
-    ]
-    for font_path in font_paths:
-        if os.path.exists(font_path):
-            try:
-                font = ImageFont.truetype(font_path, font_size)
-                break
-            except:
-                continue
-except:
-    pass
-
-if font is None:
-    font = ImageFont.load_default()
-
-# Calculate text position to center it
-try:
-    bbox = draw.textbbox((0, 0), letter, font=font)
-    text_width = bbox[2] - bbox[0]
-    text_height = bbox[3] - bbox[1]
-except:
-    text_width = font_size * 0.6
-    text_height = font_size
-
-text_x = (size - text_width) / 2
-text_y = (size - text_height) / 2
-
-# Draw text in white
-draw.text((text_x, text_y), letter, fill=(255, 255, 255, 255), font=font)
-
-# Save image as PNG
-img.save(output_path, 'PNG')
-print(output_path)
-'''
-
-    # Try to run with system Python that has PIL
-    python_paths = [
-        '/usr/local/bin/python3',
-        '/opt/homebrew/bin/python3',
-        '/usr/bin/python3',
-        sys.executable
-    ]
-
-    for python_path in python_paths:
-        if not os.path.exists(python_path):
-            continue
+    return output_path
 
-        try:
-            result = subprocess.run(
-                [python_path, '-c', script],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
 
-            if result.returncode == 0 and os.path.exists(output_path):
-                return output_path
-        except (subprocess.TimeoutExpired, Exception):
-            continue
+def generate_avatar_svg(name: str, output_path: str, size: int = 256) -> str:
+    """
+    Generate a circular avatar SVG with the first letter of the name.
+
+    Args:
+        name (str): Profile name
+        output_path (str): Path where to save the generated avatar
+        size (int): Size of the avatar image in pixels (default 256)
 
-    return None
+    Returns:
+        str: Path to the generated avatar SVG file, or None if failed
+    """
+    half = size // 2
+    rendered = _SVG_TEMPLATE.format_map(
+        {
+            "size": size,
+            "half": half,
+            "bg": get_color_from_name(name),
+            "fs": half,
+            "letter": escape(name[0].upper() if name else "?"),
+        }
+    )
+
+    # Ensure output directory exists
+    _ensure_dir(os.path.dirname(output_path))
+
+    try:
+        _write_atomic(output_path, rendered.encode())
+    except OSError:
+        return None
+    return output_path
+
+
+def generate_avatar(name: str, output_path: str, backend: str = "pil", size: int = 256) -> str:
+    """
+    Generate an avatar with the given backend.
+
+    Args:
+        name (str): Profile name
+        output_path (str): Path where to save the generated avatar
+        backend (str): "pil" for PNG via Pillow or "svg" for a plain SVG file
+        size (int): Size of the avatar image in pixels (default 256)
+
+    Returns:
+        str: Path to the generated avatar file, or None if failed
+    """
+    if backend == "svg":
+        return generate_avatar_svg(name, output_path, size)
+    return generate_avatar_png(name, output_path, size)
 
 
 def get_or_create_avatar(profile_name: str, profile_dir: str, cache_dir: str) -> str:
@@ -166,24 +274,35 @@ def get_or_create_avatar(profile_name: str, profile_dir: str, cache_dir: str) ->
         cache_dir (str): Directory to cache generated avatars
 
     Returns:
-        str: Path to the avatar image PNG, or None if generation fails
+        str: Path to the avatar image (PNG, or SVG without Pillow), or None if generation fails
     """
     # Create a cache key that includes both profile_dir and profile_name hash
     # This ensures avatar regenerates when profile name changes
-    name_hash = hashlib.md5(profile_name.encode()).hexdigest()[:8]
+    name_hash = f"{zlib.crc32(profile_name.encode()):08x}"
     safe_dir = profile_dir.replace(" ", "_").replace("/", "_")
-    avatar_path_png = os.path.join(cache_dir, f"avatar_{safe_dir}_{name_hash}.png")
+    backend = "pil" if Image is not None else "svg"
+    ext = "png" if backend == "pil" else "svg"
+    avatar_path = os.path.join(cache_dir, f"avatar_{safe_dir}_{name_hash}.{ext}")
 
     # Check if avatar already exists
-    if os.path.exists(avatar_path_png):
-        return avatar_path_png
+    if avatar_path in _known_avatars:
+        return avatar_path
+    try:
+        os.stat(avatar_path)
+        _known_avatars.add(avatar_path)
+        return avatar_path
+    except FileNotFoundError:
+        pass
 
     # Clean up old avatars for this profile_dir with different names
     try:
         import glob
-        old_avatars = glob.glob(os.path.join(cache_dir, f"avatar_{safe_dir}_*.png"))
+        # Only finished avatars, in-flight .tmp files of other writers must survive
+        old_avatars = []
+        for old_ext in ("png", "svg"):
+            old_avatars += glob.glob(os.path.join(cache_dir, f"avatar_{safe_dir}_*.{old_ext}"))
         for old_avatar in old_avatars:
-            if old_avatar != avatar_path_png:
+            if old_avatar != avatar_path:
                 try:
                     os.remove(old_avatar)
                 except:
@@ -191,9 +310,35 @@ def get_or_create_avatar(profile_name: str, profile_dir: str, cache_dir: str) ->
     except:
         pass
 
-    # Generate avatar using PIL via subprocess
+    # Generate avatar using PIL, or as SVG without Pillow
     try:
-        result = generate_avatar_png(profile_name, avatar_path_png)
-        return result if result and os.path.exists(result) else None
+        result = generate_avatar(profile_name, avatar_path, backend)
+        if result:
+            _known_avatars.add(result)
+        return result
     except Exception as e:
         return None
+
+
+def get_or_create_avatars_bulk(
+    items: Iterable[Tuple[str, str]], cache_dir: str, max_workers: int = 8
+) -> Dict[Tuple[str, str], str]:
+    """
+    Get or create avatars for many profiles at once, generating missing ones in parallel.
+
+    Args:
+        items (Iterable[Tuple[str, str]]): (profile_name, profile_dir) tuples
+        cache_dir (str): Directory to cache generated avatars
+        max_workers (int): Maximum number of generator threads (default 8)
+
+    Returns:
+        Dict[Tuple[str, str], str]: Avatar path (or None) keyed by (profile_name, profile_dir)
+    """
+    items = list(dict.fromkeys(items))
+    if len(items) <= 1:
+        return {item: get_or_create_avatar(*item, cache_dir) for item in items}
+
+    # Pillow releases the GIL while drawing and encoding, so threads scale here
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as ex:
+        paths = ex.map(lambda item: get_or_create_avatar(*item, cache_dir), items)
+        return dict(zip(items, paths))
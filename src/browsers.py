@@ -18,7 +18,11 @@ from typing import Dict, List, Optional, Tuple
 import os
 
 
-@dataclass
+# User home directory, resolved once at import
+USER_DIR = os.path.expanduser("~")
+
+
+@dataclass(frozen=True)
 class BrowserConfig:
     """Configuration for a single browser."""
 
@@ -128,6 +132,10 @@ OTHER_BROWSERS = {
 # Combined browser configurations
 ALL_BROWSERS = {**CHROMIUM_BROWSERS, **OTHER_BROWSERS}
 
+# Prebuilt lookups, derived once from the tables above
+_CHROMIUM_APP_NAMES = frozenset(c.app_name for c in CHROMIUM_BROWSERS.values())
+_ALL_BROWSER_ITEMS = tuple(ALL_BROWSERS.items())
+
 
 def get_browser_config(browser_key: str) -> Optional[BrowserConfig]:
     """
@@ -176,10 +184,7 @@ def is_chromium_browser_by_app_name(app_name: str) -> bool:
     Returns:
         True if browser is Chromium-based, False otherwise
     """
-    for config in CHROMIUM_BROWSERS.values():
-        if config.app_name == app_name:
-            return True
-    return False
+    return app_name in _CHROMIUM_APP_NAMES
 
 
 def get_browser_paths(
@@ -198,8 +203,7 @@ def get_browser_paths(
     if not config:
         return None, None, None
 
-    user_dir = os.path.expanduser("~")
-    data_path = os.path.join(user_dir, config.data_path)
+    data_path = os.path.join(USER_DIR, config.data_path)
 
     if config.is_chromium_based:
         # For Chromium browsers, bookmark and history are in profile directories
@@ -207,8 +211,8 @@ def get_browser_paths(
         history_path = config.data_path  # Base path, profiles will be added later
     else:
         # For Safari, direct file paths
-        bookmark_path = os.path.join(user_dir, config.data_path, config.bookmark_file)
-        history_path = os.path.join(user_dir, config.data_path, config.history_file)
+        bookmark_path = os.path.join(USER_DIR, config.data_path, config.bookmark_file)
+        history_path = os.path.join(USER_DIR, config.data_path, config.history_file)
 
     return data_path, bookmark_path, history_path
 
@@ -223,11 +227,11 @@ def get_enabled_browsers(env_checker_func) -> List[Tuple[str, BrowserConfig]]:
     Returns:
         List of (browser_key, BrowserConfig) tuples for enabled browsers
     """
-    enabled = []
-    for browser_key, config in ALL_BROWSERS.items():
-        if env_checker_func(config.env_key):
-            enabled.append((browser_key, config))
-    return enabled
+    return [
+        (browser_key, config)
+        for browser_key, config in _ALL_BROWSER_ITEMS
+        if env_checker_func(config.env_key)
+    ]
 
 
 def get_browser_for_tab_switching(browser_key: str) -> Optional[str]:
@@ -2,17 +2,28 @@
 # -*- coding: utf-8 -*-
 import codecs
 import glob
-import json
+import hashlib
 import os
-import sys
+import pickle
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate
 from plistlib import load
-from typing import Union
 
 from Alfred3 import Items as Items
 from Alfred3 import Tools as Tools
 from Favicon import Icons
 from browsers import get_enabled_browsers, BOOKMARKS_MAP
-from avatar_generator import get_or_create_avatar
+from local_state import get_profile_info, loads, profile_dirs
+
+# Optional streaming parser for very large Bookmarks files
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Bookmarks files from this size on are stream-parsed if ijson is available
+STREAM_PARSE_MIN_SIZE = 16 * 1024 * 1024
 
 
 # Show favicon in results or default wf icon
@@ -32,119 +43,47 @@ BOOKMARKS = [
 
 def removeDuplicates(li: list) -> list:
     """
-    Removes Duplicates from bookmark file
+    Removes Duplicates from bookmark file, first entry per URL wins
 
     Args:
-        li(list): list of bookmark entries
+        li(list): list of bookmark entries (title, url, ...)
 
     Returns:
         list: filtered bookmark entries
     """
-    return list(dict.fromkeys(li))
+    seen = set()
+    unique = []
+    for entry in li:
+        url = entry[1]
+        if url not in seen:
+            seen.add(url)
+            unique.append(entry)
+    return unique
 
 
-def get_all_urls(the_json: str) -> list:
+def get_all_urls(the_json: dict) -> list:
     """
     Extract all URLs and title from Bookmark files
 
     Args:
-        the_json (str): All Bookmarks read from file
-
-    Returns:
-        list(tuble): List of tublle with Bookmarks url and title
-    """
-
-    def extract_data(data: dict):
-        if isinstance(data, dict) and data.get("type") == "url":
-            urls.append({"name": data.get("name"), "url": data.get("url")})
-        if isinstance(data, dict) and data.get("type") == "folder":
-            the_children = data.get("children")
-            get_container(the_children)
-
-    def get_container(o: Union[list, dict]):
-        if isinstance(o, list):
-            for i in o:
-                extract_data(i)
-        if isinstance(o, dict):
-            for k, i in o.items():
-                extract_data(i)
-
-    urls = list()
-    get_container(the_json)
-    s_list_dict = sorted(urls, key=lambda k: k["name"], reverse=False)
-    ret_list = [(l.get("name"), l.get("url")) for l in s_list_dict]
-    return ret_list
-
-
-def get_real_profile_name(browser_path: str, profile_dir: str) -> str:
-    """
-    Get real profile name from Local State file
-
-    Args:
-        browser_path (str): Base browser path
-        profile_dir (str): Profile directory name (Default, Profile 1, etc.)
-
-    Returns:
-        str: Real profile name or fallback to directory name
-    """
-    try:
-        local_state_path = os.path.join(browser_path, "Local State")
-        if os.path.isfile(local_state_path):
-            with open(local_state_path, "r", encoding="utf-8") as f:
-                local_state = json.load(f)
-
-            profiles = local_state.get("profile", {}).get("info_cache", {})
-            if profile_dir in profiles:
-                profile_info = profiles[profile_dir]
-                # Try 'name' field first, then 'user_name' - different Chromium browsers use different fields
-                real_name = profile_info.get("name") or profile_info.get("user_name") or profile_dir
-                return real_name
-    except (json.JSONDecodeError, KeyError, FileNotFoundError) as e:
-        Tools.log(f"Error reading Local State: {e}")
-
-    # Fallback to directory name
-    return profile_dir
-
-
-def get_profile_icon_path(browser_path: str, profile_dir: str, profile_name: str = None) -> str:
-    """
-    Get profile icon file path from Local State, or generate an avatar
-
-    Args:
-        browser_path (str): Base browser path
-        profile_dir (str): Profile directory name (Default, Profile 1, etc.)
-        profile_name (str): Profile display name (used for avatar generation)
+        the_json (dict): All Bookmarks read from file
 
     Returns:
-        str: Profile icon file path or None if not found
+        list(tuble): List of tublle with Bookmarks title and url, sorted by title
     """
-    try:
-        local_state_path = os.path.join(browser_path, "Local State")
-        if os.path.isfile(local_state_path):
-            with open(local_state_path, "r", encoding="utf-8") as f:
-                local_state = json.load(f)
-
-            profiles = local_state.get("profile", {}).get("info_cache", {})
-            if profile_dir in profiles:
-                profile_info = profiles[profile_dir]
-                picture_filename = profile_info.get("gaia_picture_file_name")
-                if picture_filename:
-                    # Profile pictures are stored in the profile directory
-                    profile_picture_path = os.path.join(
-                        browser_path, profile_dir, picture_filename
-                    )
-                    if os.path.isfile(profile_picture_path):
-                        return profile_picture_path
-
-                # No profile picture found, generate an avatar
-                if profile_name:
-                    cache_dir = Tools.getCacheDir()
-                    avatar_path = get_or_create_avatar(profile_name, profile_dir, cache_dir)
-                    return avatar_path
-    except (json.JSONDecodeError, KeyError, FileNotFoundError) as e:
-        Tools.log(f"Error reading profile icon: {e}")
-
-    return None
+    urls = []
+    # Walk the tree with an explicit stack instead of recursion
+    stack = list(the_json.values()) if type(the_json) is dict else list(the_json)
+    while stack:
+        node = stack.pop()
+        if type(node) is not dict:
+            continue
+        node_type = node.get("type")
+        if node_type == "url":
+            urls.append((node.get("name", ""), node.get("url")))
+        elif node_type == "folder":
+            stack.extend(node.get("children", ()))
+    return sorted(urls)
 
 
 def get_profile_name(path: str) -> str:
@@ -170,7 +109,7 @@ def paths_to_bookmarks() -> list:
     Get all valid bookmarks paths from BOOKMARKS (all profiles)
 
     Returns:
-        list: valid bookmark paths with browser, profile info, and icon path
+        list: valid bookmark paths with browser, profile info, icon path and os.stat result of the bookmark file
     """
     user_dir = os.path.expanduser("~")
     valid_bms = list()
@@ -179,69 +118,60 @@ def paths_to_bookmarks() -> list:
         if browser_name == "safari":
             # Safari has only one bookmark file
             full_path = os.path.join(user_dir, browser_path)
-            if os.path.isfile(full_path):
-                valid_bms.append((browser_name, "Safari", full_path, None))
+            try:
+                st = os.stat(full_path)
+                valid_bms.append((browser_name, "Safari", full_path, None, st))
                 Tools.log(f"{full_path} → found (Safari)")
-            else:
+            except OSError:
                 Tools.log(f"{full_path} → NOT found (Safari)")
         else:
             # Chromium-based browsers - check all profiles
             base_path = os.path.join(user_dir, browser_path)
-            if os.path.isdir(base_path):
+            try:
                 # Look for Default and Profile* directories
-                profile_patterns = ["Default", "Profile*"]
-                for pattern in profile_patterns:
-                    profile_dirs = glob.glob(os.path.join(base_path, pattern))
-                    for profile_dir in profile_dirs:
-                        if os.path.isdir(profile_dir):
-                            bookmark_file = os.path.join(profile_dir, "Bookmarks")
-                            if os.path.isfile(bookmark_file):
-                                profile_dir_name = os.path.basename(profile_dir)
-                                # Get real profile name and icon for supported browsers
-                                if browser_name in [
-                                    "edge",
-                                    "chrome",
-                                    "chromium",
-                                    "brave",
-                                    "brave_beta",
-                                    "opera",
-                                    "sidekick",
-                                    "vivaldi",
-                                    "arc",
-                                    "dia",
-                                    "comet",
-                                ]:
-                                    profile_name = get_real_profile_name(
-                                        base_path, profile_dir_name
-                                    )
-                                    profile_icon_path = get_profile_icon_path(
-                                        base_path, profile_dir_name, profile_name
-                                    )
-                                else:
-                                    profile_name = get_profile_name(bookmark_file)
-                                    profile_icon_path = None
-                                valid_bms.append(
-                                    (
-                                        browser_name,
-                                        profile_name,
-                                        bookmark_file,
-                                        profile_icon_path,
-                                    )
-                                )
-                                Tools.log(
-                                    f"{bookmark_file} → found ({browser_name} - {profile_name})"
-                                )
-                            else:
-                                Tools.log(
-                                    f"{bookmark_file} → NOT found ({browser_name} - {profile_dir_name})"
-                                )
-            else:
+                browser_profiles = profile_dirs(base_path)
+            except OSError:
                 Tools.log(f"{base_path} → NOT found ({browser_name})")
+                continue
+            for profile_dir in browser_profiles:
+                profile_dir_name = profile_dir.name
+                bookmark_file = os.path.join(profile_dir.path, "Bookmarks")
+                try:
+                    st = os.stat(bookmark_file)
+                except OSError:
+                    Tools.log(
+                        f"{bookmark_file} → NOT found ({browser_name} - {profile_dir_name})"
+                    )
+                    continue
+                # Get real profile name and icon for supported browsers
+                if browser_name in [
+                    "edge",
+                    "chrome",
+                    "chromium",
+                    "brave",
+                    "brave_beta",
+                    "opera",
+                    "sidekick",
+                    "vivaldi",
+                    "arc",
+                    "dia",
+                    "comet",
+                ]:
+                    profile_name, profile_icon_path = get_profile_info(
+                        base_path, profile_dir_name
+                    )
+                else:
+                    profile_name = get_profile_name(bookmark_file)
+                    profile_icon_path = None
+                valid_bms.append(
+                    (browser_name, profile_name, bookmark_file, profile_icon_path, st)
+                )
+                Tools.log(f"{bookmark_file} → found ({browser_name} - {profile_name})")
 
     return valid_bms
 
 
-def get_json_from_file(file: str) -> json:
+def get_json_from_file(file: str) -> dict:
     """
     Get Bookmark JSON
 
@@ -249,30 +179,85 @@ def get_json_from_file(file: str) -> json:
         file(str): File path to valid bookmark file
 
     Returns:
-        str: JSON of Bookmarks
+        dict: JSON of Bookmarks
+    """
+    with open(file, "rb") as f:
+        buf = f.read()
+    # Bytes go straight into the parser, only the UTF-8 BOM needs stripping
+    if buf[:3] == codecs.BOM_UTF8:
+        buf = buf[3:]
+    return loads(buf)["roots"]
+
+
+def get_all_urls_streaming(file: str) -> list:
+    """
+    Extract all URLs and title from a Bookmark file with the ijson streaming
+    parser, without building the whole JSON tree in memory
+
+    Args:
+        file (str): File path to valid bookmark file
+
+    Returns:
+        list(tuble): List of tublle with Bookmarks title and url, sorted by title
     """
-    return json.load(codecs.open(file, "r", "utf-8-sig"))["roots"]
+    urls = []
+    # One (is_array, key, value) entry per open JSON container, key is the map key
+    # it was opened under. For maps, value collects name/type/url of bookmark nodes
+    # (None for other maps); for arrays, it tells if they hold a node's children.
+    stack = []
+    key = None
+    with open(file, "rb") as f:
+        if f.read(3) != codecs.BOM_UTF8:
+            f.seek(0)
+        for _, event, value in ijson.parse(f):
+            if event == "map_key":
+                key = value
+            elif event == "start_map":
+                # Bookmark nodes are the values of "roots" and the children of nodes
+                if not stack:
+                    is_node = False
+                elif stack[-1][0]:
+                    is_node = stack[-1][2]
+                else:
+                    is_node = len(stack) == 2 and stack[-1][1] == "roots"
+                stack.append((False, key, {} if is_node else None))
+            elif event == "start_array":
+                is_children = key == "children" and bool(stack) and stack[-1][2] is not None
+                stack.append((True, key, is_children))
+            elif event in ("end_map", "end_array"):
+                is_array, _, fields = stack.pop()
+                if not is_array and fields and fields.get("type") == "url":
+                    urls.append((fields.get("name", ""), fields.get("url")))
+            elif event == "string" and stack and not stack[-1][0] and stack[-1][2] is not None:
+                if key in ("name", "type", "url"):
+                    stack[-1][2][key] = value
+    return sorted(urls)
 
 
 def extract_safari_bookmarks(bookmark_data, bookmarks_list) -> None:
     """
-    Recursively extract bookmarks (title and URL) from Safari bookmarks data.
+    Extract bookmarks (title and URL) from Safari bookmarks data, walking the tree
+    with an explicit stack instead of recursion.
     Args:
         bookmark_data (list or dict): The Safari bookmarks data, which can be a list or a dictionary.
         bookmarks_list (list): The list to which extracted bookmarks (title and URL) will be appended.
     Returns:
         None
     """
-    if isinstance(bookmark_data, list):
-        for item in bookmark_data:
-            extract_safari_bookmarks(item, bookmarks_list)
-    elif isinstance(bookmark_data, dict):
-        if "Children" in bookmark_data:
-            extract_safari_bookmarks(bookmark_data["Children"], bookmarks_list)
-        elif "URLString" in bookmark_data and "URIDictionary" in bookmark_data:
-            title = bookmark_data["URIDictionary"].get("title", "Untitled")
-            url = bookmark_data["URLString"]
-            bookmarks_list.append((title, url))
+    stack = [bookmark_data]
+    while stack:
+        node = stack.pop()
+        node_type = type(node)
+        if node_type is list:
+            # Reversed to keep the document order when popping
+            stack.extend(reversed(node))
+        elif node_type is dict:
+            children = node.get("Children")
+            if children is not None:
+                stack.append(children)
+            elif "URLString" in node and "URIDictionary" in node:
+                title = node["URIDictionary"].get("title", "Untitled")
+                bookmarks_list.append((title, node["URLString"]))
 
 
 def get_safari_bookmarks_json(file: str) -> list:
@@ -293,135 +278,182 @@ def get_safari_bookmarks_json(file: str) -> list:
     return bookmarks
 
 
-def match(search_term: str, results: list) -> list:
+def get_search_terms(search_term: str) -> tuple:
     """
-    Filters a list of tuples based on a search term.
+    Split search string into lower case terms and the logic to combine them
+
     Args:
         search_term (str): The term to search for. Can include '&' or '|' to specify AND or OR logic.
-        results (list): A list of tuples to search within.
+
     Returns:
-        list: A list of tuples that match the search term based on the specified logic.
+        tuple: (list of lower case search terms, True for AND / False for OR logic)
     """
-
-    def is_in_tuple(tple: tuple, st: str) -> bool:
-        match = False
-        for e in tple:
-            if st.lower() in str(e).lower():
-                match = True
-        return match
-
-    result_lst = []
     if "&" in search_term:
-        search_terms = search_term.split("&")
-        search_operator = "&"
+        search_terms, match_all = search_term.split("&"), True
     elif "|" in search_term:
-        search_terms = search_term.split("|")
-        search_operator = "|"
+        search_terms, match_all = search_term.split("|"), False
     else:
-        search_terms = search_term.split()
-        search_operator = "AND" if search_operator_default else "OR"
+        search_terms, match_all = search_term.split(), search_operator_default
+    return [t.lower() for t in search_terms], match_all
 
-    for r in results:
-        if search_operator == "&" or search_operator == "AND":
-            if all([is_in_tuple(r, ts) for ts in search_terms]):
-                result_lst.append(r)
-        elif search_operator == "|" or search_operator == "OR":
-            if any([is_in_tuple(r, ts) for ts in search_terms]):
-                result_lst.append(r)
 
-    return result_lst
+def parse_bookmarks(browser_name: str, bookmarks_file: str, size: int = 0) -> list:
+    """
+    Parse all bookmarks of one bookmark file
 
+    Args:
+        browser_name (str): Browser key
+        bookmarks_file (str): Path to the bookmark file
+        size (int, optional): File size in bytes, large files are stream-parsed if possible
 
-def match_with_profile_info(search_term: str, results: list) -> list:
+    Returns:
+        list: List of bookmarks (title and URL)
     """
-    Filters a list of tuples with profile info based on a search term.
+    if browser_name == "safari":
+        return get_safari_bookmarks_json(bookmarks_file)
+    if ijson is not None and size >= STREAM_PARSE_MIN_SIZE:
+        return get_all_urls_streaming(bookmarks_file)
+    return get_all_urls(get_json_from_file(bookmarks_file))
+
+
+def load_bookmarks(bm: tuple, cache_dir: str) -> list:
+    """
+    Load all bookmarks of one bookmark file, from the parsed-bookmarks cache
+    if the file did not change (same mtime and size) since it was last parsed
+
     Args:
-        search_term (str): The term to search for. Can include '&' or '|' to specify AND or OR logic.
-        results (list): A list of tuples (title, url, browser, profile, icon_path) to search within.
+        bm (tuple): (browser_name, profile_name, bookmarks_file, profile_icon_path, stat) as returned by paths_to_bookmarks
+        cache_dir (str): Directory for the parsed-bookmarks cache
+
     Returns:
-        list: A list of tuples that match the search term based on the specified logic.
+        list: List of bookmarks (title and URL)
     """
+    browser_name, bookmarks_file, st = bm[0], bm[2], bm[4]
+    path_hash = hashlib.blake2s(bookmarks_file.encode()).hexdigest()
+    cache_file = os.path.join(
+        cache_dir, f"bm_{path_hash}.{st.st_mtime_ns}-{st.st_size}.pkl"
+    )
+    try:
+        with open(cache_file, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        pass
 
-    def is_in_tuple_with_profile(tple: tuple, st: str) -> bool:
-        match = False
-        # Search in title and url only (not browser/profile/icon info)
-        for e in tple[:2]:
-            if st.lower() in str(e).lower():
-                match = True
-        return match
+    bookmarks = parse_bookmarks(browser_name, bookmarks_file, st.st_size)
+    try:
+        # Remove caches of older versions of this file
+        for stale in glob.glob(os.path.join(cache_dir, f"bm_{path_hash}.*.pkl")):
+            os.remove(stale)
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "wb") as f:
+            pickle.dump(bookmarks, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        Tools.log(f"Error writing bookmark cache: {e}")
+    return bookmarks
 
-    result_lst = []
-    if "&" in search_term:
-        search_terms = search_term.split("&")
-        search_operator = "&"
-    elif "|" in search_term:
-        search_terms = search_term.split("|")
-        search_operator = "|"
-    else:
-        search_terms = search_term.split()
-        search_operator = "AND" if search_operator_default else "OR"
 
-    for r in results:
-        if search_operator == "&" or search_operator == "AND":
-            if all([is_in_tuple_with_profile(r, ts) for ts in search_terms]):
-                result_lst.append(r)
-        elif search_operator == "|" or search_operator == "OR":
-            if any([is_in_tuple_with_profile(r, ts) for ts in search_terms]):
-                result_lst.append(r)
+def _rows_containing(text: str, row_ends: list, term: str) -> set:
+    """
+    Find the rows of a joined text blob that contain a term
+
+    Args:
+        text (str): All rows joined with a separator
+        row_ends (list): Offset right after each row's separator
+        term (str): The term to search for
 
-    return result_lst
+    Returns:
+        set: Indexes of the rows containing the term
+    """
+    rows = set()
+    pos = text.find(term)
+    while pos != -1:
+        i = bisect_right(row_ends, pos)
+        rows.add(i)
+        # Continue in the next row, one hit per row is enough
+        pos = text.find(term, row_ends[i])
+    return rows
 
 
-def main():
-    # Log python version
-    Tools.log("PYTHON VERSION:", sys.version)
-    # check python > 3.7.0
-    if sys.version_info < (3, 7):
-        Tools.log("Python version 3.7.0 or higher required!")
-        sys.exit(0)
+def match(search_term: str, results: list) -> list:
+    """
+    Filters a list of tuples based on a search term.
+    All tuples are joined into one lower case text which is scanned once per
+    search term with str.find, instead of testing every tuple in Python.
+
+    Args:
+        search_term (str): The term to search for. Can include '&' or '|' to specify AND or OR logic.
+        results (list): A list of tuples to search within.
+
+    Returns:
+        list: A list of tuples that match the search term based on the specified logic.
+    """
+    search_terms, match_all = get_search_terms(search_term)
+    if not results or not search_terms:
+        return list(results) if match_all else []
+
+    # Lower case per row, lower() may change the length of some characters
+    rows = ["\x00".join(map(str, r)).lower() for r in results]
+    row_ends = list(accumulate(len(row) + 1 for row in rows))
+    text = "\x01".join(rows)
+
+    matched = _rows_containing(text, row_ends, search_terms[0])
+    for t in search_terms[1:]:
+        if match_all:
+            if not matched:
+                break
+            matched &= _rows_containing(text, row_ends, t)
+        else:
+            matched |= _rows_containing(text, row_ends, t)
+    return [results[i] for i in sorted(matched)]
 
+
+def main():
     # Workflow item object
     wf = Items()
-    query = Tools.getArgv(1) if Tools.getArgv(1) is not None else str()
+    query = Tools.getArgv(1)
     bms = paths_to_bookmarks()
 
     if len(bms) > 0:
         matches = list()
+        cache_dir = Tools.getCacheDir()
+        # Load all bookmark files in parallel, results keep the order of bms
+        with ThreadPoolExecutor(max_workers=min(8, len(bms))) as ex:
+            loaded = list(ex.map(lambda bm: load_bookmarks(bm, cache_dir), bms))
+        # Bookmarks (title, url) already passed to the search, shared across profiles
+        seen = set()
         # Generate list of bookmarks matches the search
-        for browser_name, profile_name, bookmarks_file, profile_icon_path in bms:
-            if browser_name == "safari":
-                bookmarks = get_safari_bookmarks_json(bookmarks_file)
-            else:
-                bm_json = get_json_from_file(bookmarks_file)
-                bookmarks = get_all_urls(bm_json)
-
-            # Add browser, profile info, and icon path to each bookmark
-            bookmarks_with_info = [
+        for bm, bookmarks in zip(bms, loaded):
+            browser_name, profile_name, _, profile_icon_path, _ = bm
+            # Identical bookmarks match identically, search each one only once
+            unique = []
+            for bookmark in bookmarks:
+                if bookmark not in seen:
+                    seen.add(bookmark)
+                    unique.append(bookmark)
+            # Filter first, then add browser, profile info, and icon path to the matches only
+            matches.extend(
                 (title, url, browser_name, profile_name, profile_icon_path)
-                for title, url in bookmarks
-            ]
-            matched_bookmarks = match_with_profile_info(query, bookmarks_with_info)
-            matches.extend(matched_bookmarks)
+                for title, url in match(query, unique)
+            )
 
-        # finally remove duplicates from all browser bookmarks
+        # finally remove duplicate URLs with different titles
         matches = removeDuplicates(matches)
-        # generate list of matches for Favicon download
-        ico_matches = []
+        # Heat Favicon Cache, matches hold the URL at index 1
         if show_favicon:
-            ico_matches = [(m[1], m[0]) for m in matches]
-        # Heat Favicon Cache
-        ico = Icons(ico_matches)
+            ico = Icons(matches, url_idx=1)
+        else:
+            # Check each distinct profile icon once, not per bookmark
+            profile_icon_valid = {
+                icon_path: os.path.isfile(icon_path)
+                for icon_path in {m[4] for m in matches if m[4]}
+            }
         # generate script filter output
-        for m in matches:
-            title = m[0]
-            url = m[1]
-            browser_name = m[2]
-            profile_name = m[3]
-            profile_icon_path = m[4] if len(m) > 4 else None
+        for title, url, browser_name, profile_name, profile_icon_path in matches:
             name = title if title else url.split("/")[2]
 
             # Create subtitle with just URL
-            subtitle = f"{url[:60]}..." if len(url) > 60 else url
+            subtitle = url if len(url) <= 60 else f"{url[:60]}..."
 
             wf.setItem(title=name, subtitle=subtitle, arg=url, quicklookurl=url)
             if show_favicon:
@@ -431,7 +463,7 @@ def main():
                     wf.setIcon(favicon, "image")
             else:
                 # Use profile icon file when favicon is disabled
-                if profile_icon_path and os.path.isfile(profile_icon_path):
+                if profile_icon_path and profile_icon_valid[profile_icon_path]:
                     wf.setIcon(profile_icon_path, "image")
                 else:
                     # Fallback to default icon
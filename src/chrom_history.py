@@ -1,21 +1,25 @@
 #!/usr/bin/python3
 # -*- coding: utf-8 -*-
-import difflib
-import glob
 import os
+import pickle
+import re
 import shutil
 import sqlite3
 import sys
+import tempfile
 import time
-import uuid
-from multiprocessing.pool import ThreadPool as Pool
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from functools import lru_cache
+from operator import itemgetter
 from unicodedata import normalize
+from urllib.parse import quote, urlsplit
 
 from Alfred3 import Items as Items
 from Alfred3 import Tools as Tools
 from Favicon import Icons
 from browsers import get_enabled_browsers, HISTORY_MAP
-from avatar_generator import get_or_create_avatar
+from local_state import get_profile_info, profile_dirs
 
 # Get Browser Histories to load per env (true/false)
 HISTORIES = [
@@ -28,7 +32,11 @@ HISTORIES = [
 
 # Get ignored Domains settings
 d = Tools.getEnv("ignored_domains", None)
-ignored_domains = d.split(",") if d else None
+ignored_domains = (
+    frozenset(i.strip().lower().lstrip(".") for i in d.replace("\n", ",").split(",") if i.strip())
+    if d
+    else None
+)
 
 # Show favicon in results or default wf icon
 show_favicon = Tools.getEnvBool("show_favicon")
@@ -42,81 +50,8 @@ sort_recent = Tools.getEnvBool("sort_recent")
 
 # Date format settings
 DATE_FMT = Tools.getEnv("date_format", default="%d. %B %Y")
-
-
-def get_real_profile_name_from_history(browser_path: str, profile_dir: str) -> str:
-    """
-    Get real profile name from Local State file for history
-
-    Args:
-        browser_path (str): Base browser path
-        profile_dir (str): Profile directory name (Default, Profile 1, etc.)
-
-    Returns:
-        str: Real profile name or fallback to directory name
-    """
-    try:
-        local_state_path = os.path.join(browser_path, "Local State")
-        if os.path.isfile(local_state_path):
-            import json
-
-            with open(local_state_path, "r", encoding="utf-8") as f:
-                local_state = json.load(f)
-
-            profiles = local_state.get("profile", {}).get("info_cache", {})
-            if profile_dir in profiles:
-                profile_info = profiles[profile_dir]
-                # Try 'name' field first, then 'user_name' - different Chromium browsers use different fields
-                real_name = profile_info.get("name") or profile_info.get("user_name") or profile_dir
-                return real_name
-    except (json.JSONDecodeError, KeyError, FileNotFoundError) as e:
-        Tools.log(f"Error reading Local State: {e}")
-
-    # Fallback to directory name
-    return profile_dir
-
-
-def get_profile_icon_path_from_history(browser_path: str, profile_dir: str, profile_name: str = None) -> str:
-    """
-    Get profile icon file path from Local State for history, or generate an avatar
-
-    Args:
-        browser_path (str): Base browser path
-        profile_dir (str): Profile directory name (Default, Profile 1, etc.)
-        profile_name (str): Profile display name (used for avatar generation)
-
-    Returns:
-        str: Profile icon file path or None if not found
-    """
-    try:
-        local_state_path = os.path.join(browser_path, "Local State")
-        if os.path.isfile(local_state_path):
-            import json
-
-            with open(local_state_path, "r", encoding="utf-8") as f:
-                local_state = json.load(f)
-
-            profiles = local_state.get("profile", {}).get("info_cache", {})
-            if profile_dir in profiles:
-                profile_info = profiles[profile_dir]
-                picture_filename = profile_info.get("gaia_picture_file_name")
-                if picture_filename:
-                    # Profile pictures are stored in the profile directory
-                    profile_picture_path = os.path.join(
-                        browser_path, profile_dir, picture_filename
-                    )
-                    if os.path.isfile(profile_picture_path):
-                        return profile_picture_path
-
-                # No profile picture found, generate an avatar
-                if profile_name:
-                    cache_dir = Tools.getCacheDir()
-                    avatar_path = get_or_create_avatar(profile_name, profile_dir, cache_dir)
-                    return avatar_path
-    except (json.JSONDecodeError, KeyError, FileNotFoundError) as e:
-        Tools.log(f"Error reading profile icon: {e}")
-
-    return None
+# strftime directives which only depend on the date
+DATE_DIRECTIVES = frozenset("aAbBCdDeFgGhjmuUVwWxyY%")
 
 
 def get_profile_name_from_history(path: str) -> str:
@@ -159,181 +94,249 @@ def history_paths() -> list:
         else:
             # Chromium-based browsers - check all profiles
             base_path = os.path.join(user_dir, browser_path)
-            if os.path.isdir(base_path):
+            try:
                 # Look for Default and Profile* directories
-                profile_patterns = ["Default", "Profile*"]
-                for pattern in profile_patterns:
-                    profile_dirs = glob.glob(os.path.join(base_path, pattern))
-                    for profile_dir in profile_dirs:
-                        if os.path.isdir(profile_dir):
-                            history_file = os.path.join(profile_dir, "History")
-                            if os.path.isfile(history_file):
-                                profile_dir_name = os.path.basename(profile_dir)
-                                # Get real profile name and icon for supported browsers
-                                if browser_name in [
-                                    "edge",
-                                    "chrome",
-                                    "chromium",
-                                    "brave",
-                                    "brave_beta",
-                                    "opera",
-                                    "sidekick",
-                                    "vivaldi",
-                                    "arc",
-                                    "dia",
-                                    "comet",
-                                ]:
-                                    profile_name = get_real_profile_name_from_history(
-                                        base_path, profile_dir_name
-                                    )
-                                    profile_icon_path = (
-                                        get_profile_icon_path_from_history(
-                                            base_path, profile_dir_name, profile_name
-                                        )
-                                    )
-                                else:
-                                    profile_name = get_profile_name_from_history(
-                                        history_file
-                                    )
-                                    profile_icon_path = None
-                                valid_hists.append(
-                                    (
-                                        browser_name,
-                                        profile_name,
-                                        history_file,
-                                        profile_icon_path,
-                                    )
-                                )
-                                Tools.log(
-                                    f"{history_file} → found ({browser_name} - {profile_name})"
-                                )
-                            else:
-                                Tools.log(
-                                    f"{history_file} → NOT found ({browser_name} - {profile_dir_name})"
-                                )
-            else:
+                browser_profiles = profile_dirs(base_path)
+            except OSError:
                 Tools.log(f"{base_path} → NOT found ({browser_name})")
+                continue
+            for profile_dir in browser_profiles:
+                profile_dir_name = profile_dir.name
+                history_file = os.path.join(profile_dir.path, "History")
+                if not os.path.isfile(history_file):
+                    Tools.log(
+                        f"{history_file} → NOT found ({browser_name} - {profile_dir_name})"
+                    )
+                    continue
+                # Get real profile name and icon for supported browsers
+                if browser_name in [
+                    "edge",
+                    "chrome",
+                    "chromium",
+                    "brave",
+                    "brave_beta",
+                    "opera",
+                    "sidekick",
+                    "vivaldi",
+                    "arc",
+                    "dia",
+                    "comet",
+                ]:
+                    profile_name, profile_icon_path = get_profile_info(
+                        base_path, profile_dir_name
+                    )
+                    # Check once per profile, main() trusts the path
+                    if profile_icon_path and not os.path.isfile(profile_icon_path):
+                        profile_icon_path = None
+                else:
+                    profile_name = get_profile_name_from_history(history_file)
+                    profile_icon_path = None
+                valid_hists.append(
+                    (
+                        browser_name,
+                        profile_name,
+                        history_file,
+                        profile_icon_path,
+                    )
+                )
+                Tools.log(f"{history_file} → found ({browser_name} - {profile_name})")
 
     return valid_hists
 
 
+def history_paths_signature() -> tuple:
+    """
+    Signature of the history files setup, changes with the browsers' Local State files
+
+    Returns:
+        tuple: (browser, path, mtime_ns or None) for each configured browser
+    """
+    user_dir = os.path.expanduser("~")
+    signature = list()
+    for browser_name, browser_path in HISTORIES:
+        if browser_name == "safari":
+            path = os.path.join(user_dir, browser_path)
+        else:
+            # Local State is rewritten when profiles are added, removed or renamed
+            path = os.path.join(user_dir, browser_path, "Local State")
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        signature.append((browser_name, path, mtime))
+    return tuple(signature)
+
+
+def cached_history_paths(cache_dir: str) -> list:
+    """
+    Get history_paths() from the cache as long as no Local State file changed
+
+    Args:
+        cache_dir (str): Directory for the history paths cache
+
+    Returns:
+        list: available paths of history files with browser, profile info, and icon path
+    """
+    cache_file = os.path.join(cache_dir, "history_paths.pkl")
+    signature = history_paths_signature()
+    try:
+        with open(cache_file, "rb") as f:
+            cached_signature, valid_hists = pickle.load(f)
+        # Generated avatars can be removed from the cache dir in the meantime
+        if cached_signature == signature and all(
+            icon is None or os.path.isfile(icon) for *_, icon in valid_hists
+        ):
+            Tools.log("History paths loaded from cache")
+            return valid_hists
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        pass
+
+    valid_hists = history_paths()
+    try:
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "wb") as f:
+            pickle.dump((signature, valid_hists), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        Tools.log(f"Error writing history paths cache: {e}")
+    return valid_hists
+
+
 def get_histories(dbs: list, query: str) -> list:
     """
     Load History files into list
 
     Args:
         dbs(list): list with valid history paths with browser and profile info
+        query(str): search string
 
     Returns:
         list: filters history entries
     """
 
     results = list()
-    with Pool(len(dbs)) as p:  # Exec in ThreadPool
-        results = p.map(sql_with_profile, dbs)
+    with ThreadPoolExecutor(max_workers=min(len(dbs), 8)) as ex:  # SQLite releases the GIL
+        results = list(ex.map(sql_with_profile, dbs, [query] * len(dbs)))
+    # Every History returns its best matches already filtered and limited
     matches = []
     for r in results:
         matches = matches + r
-    results = search_in_tuples_with_profile(matches, query)
     # Remove duplicate Entries
-    results = removeDuplicates(results)
-    # remove ignored domains
-    if ignored_domains:
-        results = remove_ignored_domains(results, ignored_domains)
+    results = removeDuplicates(matches)
     # Sort by element FIRST (before limiting results)
     # For 7-element tuples: (url, title, visit_count, last_visit, browser, profile, icon_path)
     sort_by = 3 if sort_recent else 2  # last_visit or visit_count
-    results = Tools.sortListTuple(results, sort_by)  # Sort based on visits or recent
+    results.sort(key=itemgetter(sort_by), reverse=True)  # Sort based on visits or recent
     # Reduce search results to 30 AFTER sorting
     results = results[:30]
     return results
 
 
-def remove_ignored_domains(results: list, ignored_domains: list) -> list:
+def _query(db_uri: str, select_statement: str, params: list) -> list:
     """
-    removes results based on domain ignore list
+    Run a SELECT on a read-only SQLite connection
 
     Args:
-        results (list): History results list with tubles
-        ignored_domains (list): list of domains to ignore
+        db_uri (str): SQLite URI of the database
+        select_statement (str): SQL statement
+        params (list): statement parameters
 
     Returns:
-        list: _description_
-    """
-    new_results = list()
-    if len(ignored_domains) > 0:
-        for r in results:
-            for i in ignored_domains:
-                inner_result = r
-                if i in r[0]:
-                    inner_result = None
-                    break
-            if inner_result:
-                new_results.append(inner_result)
-    else:
-        new_results = results
-    return new_results
-
-
-def sql(db: str) -> list:
+        list: fetched rows
+    """
+    with closing(sqlite3.connect(db_uri, uri=True)) as c:
+        # SQLite lower() and LIKE only fold ASCII, use Python for other characters
+        c.create_function("py_lower", 1, lambda v: v.lower() if v else v)
+        c.create_function("is_ignored_domain", 1, is_ignored_domain)
+        c.execute("PRAGMA query_only=1")
+        c.execute("PRAGMA temp_store=MEMORY")
+        c.execute("PRAGMA cache_size=-65536")
+        # Map the file instead of a pread() per page, the database is never written
+        c.execute("PRAGMA mmap_size=536870912")
+        return c.execute(select_statement, params).fetchall()
+
+
+def sql(db: str, browser: str, search: str, limit: int = 30) -> list:
     """
-    Executes SQL depending on History path
-    provided in db: str
+    Executes SQL depending on browser of the History file
 
     Args:
         db (str): Path to History file
+        browser (str): Browser key, e.g. chrome or safari
+        search (str): Search string (multiple words default to AND)
+        limit (int, optional): Maximum number of entries. Defaults to 30.
 
     Returns:
-        list: result list of dictionaries (Url, Title, VisiCount)
+        list: result list of tuples (Url, Title, VisiCount, LastVisit)
     """
     res = []
-    history_db = f"/tmp/{uuid.uuid1()}"
+    order_by = "last_visit" if sort_recent else "visit_count"
+    # SQL satement for Safari
+    if browser == "safari":
+        condition, params = search_condition(
+            search, "history_items.url", "history_visits.title"
+        )
+        select_statement = f"""
+            SELECT history_items.url, history_visits.title, history_items.visit_count AS visit_count,
+                (MAX(history_visits.visit_time) + 978307200) AS last_visit
+            FROM history_items
+                INNER JOIN history_visits
+                ON history_visits.history_item = history_items.id
+            WHERE history_items.url IS NOT NULL AND
+                history_visits.TITLE IS NOT NULL AND
+                history_items.url != '' AND {condition}
+            GROUP BY history_items.url, history_visits.title
+            ORDER BY {order_by} DESC LIMIT ?
+        """
+    # SQL statement for Chromium Brothers
+    else:
+        condition, params = search_condition(search, "urls.url", "urls.title")
+        select_statement = f"""
+            SELECT urls.url, urls.title, urls.visit_count AS visit_count,
+                (urls.last_visit_time/1000000 + (strftime('%s', '1601-01-01'))) AS last_visit
+            FROM urls
+            WHERE urls.title IS NOT NULL AND
+            urls.title != '' AND {condition}
+            ORDER BY {order_by} DESC LIMIT ?; """
+    params.append(limit)
+    Tools.log(select_statement)
     try:
-        shutil.copy2(db, history_db)
-        with sqlite3.connect(history_db) as c:
-            cursor = c.cursor()
-            # SQL satement for Safari
-            if "Safari" in db:
-                select_statement = f"""
-                    SELECT history_items.url, history_visits.title, history_items.visit_count,(history_visits.visit_time + 978307200)
-                    FROM history_items
-                        INNER JOIN history_visits
-                        ON history_visits.history_item = history_items.id
-                    WHERE history_items.url IS NOT NULL AND
-						history_visits.TITLE IS NOT NULL AND
-						history_items.url != '' order by visit_time DESC
-                """
-            # SQL statement for Chromium Brothers
-            else:
-                select_statement = f"""
-                    SELECT DISTINCT urls.url, urls.title, urls.visit_count, (urls.last_visit_time/1000000 + (strftime('%s', '1601-01-01')))
-                    FROM urls, visits
-                    WHERE urls.id = visits.url AND
-                    urls.title IS NOT NULL AND
-                    urls.title != '' order by last_visit_time DESC; """
-            Tools.log(select_statement)
-            cursor.execute(select_statement)
-            r = cursor.fetchall()
-            res.extend(r)
-        os.remove(history_db)  # Delete History file in /tmp
+        try:
+            # Read the live History file in place, without locking or copying it
+            res = _query(
+                f"file:{quote(db)}?immutable=1&mode=ro", select_statement, params
+            )
+        except sqlite3.Error as e:
+            # Fall back to a private copy, e.g. when the browser holds an exclusive lock
+            Tools.log(f"Reading copy of {db}: {e}")
+            fd, history_db = tempfile.mkstemp()
+            os.close(fd)
+            try:
+                shutil.copy2(db, history_db)
+                res = _query(
+                    f"file:{quote(history_db)}?mode=ro", select_statement, params
+                )
+            finally:
+                os.remove(history_db)  # Delete History copy in tmp
     except sqlite3.Error as e:
         Tools.log(f"SQL Error: {e}")
         sys.exit(1)
     return res
 
 
-def sql_with_profile(db_info: tuple) -> list:
+def sql_with_profile(db_info: tuple, search: str) -> list:
     """
     Executes SQL with profile information
 
     Args:
         db_info (tuple): (browser_name, profile_name, db_path, profile_icon_path)
+        search (str): Search string
 
     Returns:
         list: result list with browser, profile info, and icon path added
     """
     browser_name, profile_name, db_path, profile_icon_path = db_info
-    results = sql(db_path)
+    results = sql(db_path, browser_name, search)
     # Add browser, profile info, and icon path to each result
     return [
         (
@@ -349,7 +352,7 @@ def sql_with_profile(db_info: tuple) -> list:
     ]
 
 
-def get_search_terms(search: str) -> tuple:
+def get_search_terms(search: str) -> list:
     """
     Explode search term string - now defaults to AND for multiple words
 
@@ -357,45 +360,107 @@ def get_search_terms(search: str) -> tuple:
         search(str): search term(s), can contain & or | for explicit operators
 
     Returns:
-        tuple: Tuple with search terms
+        list: List with search terms
     """
     # Check for explicit operators first
     if "&" in search:
-        search_terms = tuple(search.split("&"))
+        search_terms = search.split("&")
     elif "|" in search:
-        search_terms = tuple(search.split("|"))
+        search_terms = search.split("|")
     else:
         # Default behavior: split by spaces and treat as AND
-        search_terms = tuple(search.split())
+        search_terms = search.split()
 
-    search_terms = [normalize("NFC", s) for s in search_terms]
-    return search_terms
+    # ASCII is already NFC
+    return [s if s.isascii() else normalize("NFC", s) for s in search_terms]
 
 
-def removeDuplicates(li: list) -> list:
+def is_ignored_domain(url: str) -> bool:
     """
-    Removes Duplicates from history file
+    Check if the URL's host or one of its parent domains is ignored
 
     Args:
-        li(list): list of history entries
+        url (str): URL of the history entry
 
     Returns:
-        list: filtered history entries
+        bool: True if the domain is in ignored_domains
+    """
+    try:
+        host = urlsplit(url).hostname or ""
+    except ValueError:
+        return False
+    parts = host.split(".")
+    return not ignored_domains.isdisjoint(".".join(parts[i:]) for i in range(len(parts)))
+
+
+def _like_pattern(term: str) -> str:
     """
-    if not li:
-        return []
+    LIKE pattern matching the term anywhere, with wildcards escaped by backslash
+
+    Args:
+        term (str): search term
 
-    # Check if entries have profile info with icon (7 elements), profile info (6 elements), or not (4 elements)
-    if len(li[0]) == 7:
-        # With profile info and icon: (url, title, visit_count, last_visit, browser, profile, icon_path)
-        unique_entries = {(a, b): (a, b, c, d, e, f, g) for a, b, c, d, e, f, g in li}
-    elif len(li[0]) == 6:
-        # With profile info: (url, title, visit_count, last_visit, browser, profile)
-        unique_entries = {(a, b): (a, b, c, d, e, f) for a, b, c, d, e, f in li}
+    Returns:
+        str: LIKE pattern
+    """
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def search_condition(search: str, url_col: str, title_col: str) -> tuple:
+    """
+    Build SQL WHERE condition for search terms and ignored domains
+
+    Args:
+        search (str): Search string (multiple words default to AND)
+        url_col (str): url column
+        title_col (str): title column
+
+    Returns:
+        tuple: condition string and list of its parameters
+    """
+    search_terms = get_search_terms(search)
+    # OR search via | or setting, AND otherwise
+    match_any = "|" in search or ("&" not in search and not search_operator_default)
+
+    term_conditions = list()
+    params = list()
+    for term in search_terms:
+        term = term.lower()
+        if term.isascii():
+            # LIKE is case-insensitive for ASCII
+            url, title = url_col, title_col
+        else:
+            url, title = f"py_lower({url_col})", f"py_lower({title_col})"
+        term_conditions.append(f"({url} LIKE ? ESCAPE '\\' OR {title} LIKE ? ESCAPE '\\')")
+        params += [_like_pattern(term)] * 2
+    if term_conditions:
+        condition = "(" + (" OR " if match_any else " AND ").join(term_conditions) + ")"
     else:
-        # Without profile info: (url, title, visit_count, last_visit)
-        unique_entries = {b: (a, b, c, d) for a, b, c, d in li}
+        # any() of no terms is false, all() is true
+        condition = "0" if match_any else "1"
+
+    # remove ignored domains
+    if ignored_domains:
+        condition += f" AND NOT is_ignored_domain({url_col})"
+    return condition, params
+
+
+def removeDuplicates(li: list) -> list:
+    """
+    Removes Duplicates from history file, keeping the most recent visit per URL
+
+    Args:
+        li(list): list of history entries (url, title, visit_count, last_visit, browser, profile, icon_path)
 
+    Returns:
+        list: filtered history entries
+    """
+    unique_entries = dict()
+    for r in li:
+        seen = unique_entries.get(r[0])
+        if seen is None or r[3] >= seen[3]:
+            unique_entries[r[0]] = r
     return list(unique_entries.values())
 
 
@@ -443,66 +508,53 @@ def search_in_tuples(tuples: list, search: str) -> list:
     return result
 
 
-def search_in_tuples_with_profile(tuples: list, search: str) -> list:
+def formatTimeStamp(time_ms: int, fmt: str = "%d. %B %Y") -> str:
     """
-    Search for search term in list of tuples with profile info
+    Time Stamp (ms) into formatted date string
 
     Args:
-        tuples(list): List contains tuple to search (url, title, visit_count, last_visit, browser, profile)
-        search(str): Search string (multiple words default to AND)
+
+        time_ms (int):  time in ms from 01/01/1601
+        fmt (str, optional): Format of the Date string. Defaults to '%d. %B %Y'.
 
     Returns:
-        list: tuple list with result of query string
+
+        str: Formatted Date String
     """
+    if _is_date_only(fmt):
+        # Entries of the same day share one formatted string
+        return _format_day(time_ms // 86400, fmt)
+    t_string = time.strftime(fmt, time.gmtime(time_ms))
+    return t_string
 
-    def is_in_tuple_with_profile(tple: tuple, st: str) -> bool:
-        match = False
-        # Search only in url and title (first 2 elements)
-        for e in tple[:2]:
-            if st.lower() in str(e).lower():
-                match = True
-        return match
 
-    search_terms = get_search_terms(search)
-    result = list()
+@lru_cache(maxsize=8)
+def _is_date_only(fmt: str) -> bool:
+    """
+    Check if a strftime format only contains directives of the date, no time of day
 
-    for t in tuples:
-        # Check for explicit OR operator
-        if "|" in search:
-            # OR search: any term can match
-            if any([is_in_tuple_with_profile(t, ts) for ts in search_terms]):
-                result.append(t)
-        elif "&" in search:
-            # AND search via &
-            if all([is_in_tuple_with_profile(t, ts) for ts in search_terms]):
-                result.append(t)
-        else:
-            # Default behavior based on setting
-            if search_operator_default:
-                if all([is_in_tuple_with_profile(t, ts) for ts in search_terms]):
-                    result.append(t)
-            else:
-                if any([is_in_tuple_with_profile(t, ts) for ts in search_terms]):
-                    result.append(t)
+    Args:
+        fmt (str): Format of the Date string
 
-    return result
+    Returns:
+        bool: True if the formatted string is the same for the whole day
+    """
+    return all(d in DATE_DIRECTIVES for d in re.findall(r"%(.)", fmt))
 
 
-def formatTimeStamp(time_ms: int, fmt: str = "%d. %B %Y") -> str:
+@lru_cache(maxsize=64)
+def _format_day(day: int, fmt: str) -> str:
     """
-    Time Stamp (ms) into formatted date string
+    Format a day since 01/01/1970
 
     Args:
-
-        time_ms (int):  time in ms from 01/01/1601
-        fmt (str, optional): Format of the Date string. Defaults to '%d. %B %Y'.
+        day (int): days since 01/01/1970
+        fmt (str): Format of the Date string
 
     Returns:
-
         str: Formatted Date String
     """
-    t_string = time.strftime(fmt, time.gmtime(time_ms))
-    return t_string
+    return time.strftime(fmt, time.gmtime(day * 86400))
 
 
 def main():
@@ -510,18 +562,13 @@ def main():
     wf_cache_dir = Tools.getCacheDir()
     # Get wf data directory for writing into debugger
     wf_data_dir = Tools.getDataDir()
-    # Check and write python version
     Tools.log(f"Cache Dir: {wf_cache_dir}")
     Tools.log(f"Data Dir: {wf_data_dir}")
-    Tools.log("PYTHON VERSION:", sys.version)
-    if sys.version_info < (3, 7):
-        Tools.log("Python version 3.7.0 or higher required!")
-        sys.exit(0)
 
     # Create Workflow items object
     wf = Items()
     search_term = Tools.getArgv(1)
-    locked_history_dbs = history_paths()
+    locked_history_dbs = cached_history_paths(wf_cache_dir)
     # if selected browser(s) in config was not found stop here
     if len(locked_history_dbs) == 0:
         wf.setItem(
@@ -542,9 +589,7 @@ def main():
     if len(results) > 0:
         # Cache Favicons
         if show_favicon:
-            # Convert to format expected by Icons class
-            ico_results = [(i[0], i[1]) for i in results]
-            ico = Icons(ico_results)
+            favicons = Icons(results).as_dict()
         for i in results:
             url = i[0]
             title = i[1] if i[1] else url.split("/")[2]
@@ -563,12 +608,12 @@ def main():
 
             wf.setItem(title=title, subtitle=subtitle, arg=url, quicklookurl=url)
             if show_favicon:
-                favicon = ico.get_favion_path(url)
+                favicon = favicons.get(url)
                 if favicon:
                     wf.setIcon(favicon, "image")
             else:
                 # Use profile icon file when favicon is disabled
-                if profile_icon_path and os.path.isfile(profile_icon_path):
+                if profile_icon_path:
                     wf.setIcon(profile_icon_path, "image")
                 else:
                     # Fallback to default icon
@@ -1,14 +1,13 @@
 #!/usr/bin/python3
 # -*- coding: utf-8 -*-
-import json
 import os
-import subprocess
 import sys
 from typing import List, Tuple
 
 from Alfred3 import Items as Items
 from Alfred3 import Tools as Tools
-from avatar_generator import get_or_create_avatar
+from avatar_generator import get_or_create_avatars_bulk
+from local_state import profiles_info
 
 
 def get_chromium_profiles(browser_path: str) -> List[Tuple[str, str, str]]:
@@ -21,38 +20,19 @@ def get_chromium_profiles(browser_path: str) -> List[Tuple[str, str, str]]:
     Returns:
         List[Tuple[str, str, str]]: List of tuples in format (profile_dir, real_name, icon_path)
     """
-    profiles = []
-    try:
-        local_state_path = os.path.join(browser_path, "Local State")
-        if os.path.isfile(local_state_path):
-            with open(local_state_path, "r", encoding="utf-8") as f:
-                local_state = json.load(f)
-
-            profile_info_cache = local_state.get("profile", {}).get("info_cache", {})
-
-            for profile_dir, profile_data in profile_info_cache.items():
-                # Try 'name' field first, then 'user_name' - different Chromium browsers use different fields
-                real_name = profile_data.get("name") or profile_data.get("user_name") or profile_dir
-
-                # Get profile icon path
-                icon_path = None
-                picture_filename = profile_data.get("gaia_picture_file_name")
-                if picture_filename:
-                    profile_picture_path = os.path.join(
-                        browser_path, profile_dir, picture_filename
-                    )
-                    if os.path.isfile(profile_picture_path):
-                        icon_path = profile_picture_path
-
-                # Generate avatar if no profile picture
-                if not icon_path and real_name:
-                    cache_dir = Tools.getCacheDir()
-                    icon_path = get_or_create_avatar(real_name, profile_dir, cache_dir)
-
-                profiles.append((profile_dir, real_name, icon_path))
+    profiles = [
+        (profile_dir, profile["user_name"], profile["icon_path"])
+        for profile_dir, profile in profiles_info(browser_path).items()
+    ]
 
-    except (json.JSONDecodeError, KeyError, FileNotFoundError) as e:
-        Tools.log(f"Error reading profiles from {browser_path}: {e}")
+    # Generate avatars for all profiles without a profile picture in one go
+    missing = [(name, p_dir) for p_dir, name, icon in profiles if not icon and name]
+    if missing:
+        avatars = get_or_create_avatars_bulk(missing, Tools.getCacheDir())
+        profiles = [
+            (p_dir, name, icon or avatars.get((name, p_dir)))
+            for p_dir, name, icon in profiles
+        ]
 
     # If no profiles found, add default profile
     if not profiles:
@@ -122,64 +102,8 @@ def get_all_browser_profiles() -> List[Tuple[str, str, str, str, str]]:
     return all_profiles
 
 
-def switch_to_profile(app_name: str, profile_dir: str):
-    """
-    Switch to the specified browser profile using AppleScript.
-
-    Args:
-        app_name: Browser application name (e.g., "Google Chrome")
-        profile_dir: Profile directory name (e.g., "Default", "Profile 1")
-    """
-    try:
-        # Create AppleScript to open browser with specific profile
-        # Note: Different browsers may have different profile switching methods
-        if "Chrome" in app_name:
-            # For Chrome, we can use the --profile-directory flag
-            applescript = f"""
-            do shell script "open -na '{app_name}' --args --profile-directory='{profile_dir}'"
-            """
-        elif "Brave" in app_name:
-            applescript = f"""
-            do shell script "open -na '{app_name}' --args --profile-directory='{profile_dir}'"
-            """
-        elif "Edge" in app_name:
-            applescript = f"""
-            do shell script "open -na '{app_name}' --args --profile-directory='{profile_dir}'"
-            """
-        else:
-            # For other browsers, try the generic approach
-            applescript = f"""
-            do shell script "open -na '{app_name}' --args --profile-directory='{profile_dir}'"
-            """
-
-        result = subprocess.run(
-            ["osascript", "-e", applescript], capture_output=True, text=True, timeout=10
-        )
-
-        if result.returncode == 0:
-            Tools.log(f"Successfully switched to profile: {app_name} - {profile_dir}")
-            return True
-        else:
-            Tools.log(
-                f"Failed to switch to profile: {app_name} - {profile_dir}, error: {result.stderr}"
-            )
-            return False
-
-    except Exception as e:
-        Tools.log(f"Error switching to profile {app_name} - {profile_dir}: {e}")
-        return False
-
-
 def main():
     """Main function"""
-    # Log Python version
-    Tools.log("PYTHON VERSION:", sys.version)
-
-    # Check Python 3.7 or higher
-    if sys.version_info < (3, 7):
-        Tools.log("Python version 3.7.0 or higher required!")
-        sys.exit(0)
-
     # Create Alfred workflow item object
     wf = Items()
 
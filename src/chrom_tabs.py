@@ -1,93 +1,115 @@
 #!/usr/bin/python3
 # -*- coding: utf-8 -*-
-import json
+import asyncio
+import hashlib
 import os
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple
 
 from Alfred3 import Items as Items
 from Alfred3 import Tools as Tools
-from Favicon import Icons
 from browsers import get_enabled_browsers, get_chromium_browsers
-from avatar_generator import get_or_create_avatar
 
 # Show favicon in results or default wf icon
 show_favicon = Tools.getEnvBool("show_favicon")
 
 
-def get_real_profile_name(browser_path: str, profile_dir: str) -> str:
+def get_running_apps() -> set:
     """
-    Get real profile name from Local State file
-
-    Args:
-        browser_path (str): Base browser path
-        profile_dir (str): Profile directory name (Default, Profile 1, etc.)
+    Get names of all running executables with a single ps call
 
     Returns:
-        str: Real profile name or fallback to directory name
+        set: Executable names or None if the processes could not be listed
     """
     try:
-        local_state_path = os.path.join(browser_path, "Local State")
-        if os.path.isfile(local_state_path):
-            with open(local_state_path, "r", encoding="utf-8") as f:
-                local_state = json.load(f)
+        # Full executable paths, ps -c would truncate names to 16 characters
+        result = subprocess.run(
+            ["ps", "-Ao", "comm="], capture_output=True, text=True, timeout=5
+        )
+    except (subprocess.TimeoutExpired, OSError) as e:
+        Tools.log(f"Error listing running apps: {e}")
+        return None
+    if result.returncode != 0:
+        return None
+    return {os.path.basename(line.strip()) for line in result.stdout.splitlines()}
 
-            profiles = local_state.get("profile", {}).get("info_cache", {})
-            if profile_dir in profiles:
-                profile_info = profiles[profile_dir]
-                # Try 'name' field first, then 'user_name' - different Chromium browsers use different fields
-                real_name = profile_info.get("name") or profile_info.get("user_name") or profile_dir
-                return real_name
-    except (json.JSONDecodeError, KeyError, FileNotFoundError) as e:
-        Tools.log(f"Error reading Local State: {e}")
 
-    # Fallback to directory name
-    return profile_dir
+async def compile_applescript(applescript: str, timeout: int = 10) -> str:
+    """
+    Compile an AppleScript into the workflow cache once, so osascript can skip compiling it
 
+    Args:
+        applescript (str): AppleScript source
+        timeout (int, optional): Seconds until osacompile is killed. Defaults to 10.
 
-def get_profile_icon_path(browser_path: str, profile_dir: str, profile_name: str = None) -> str:
+    Returns:
+        str: Path to the compiled script or None if it could not be compiled
     """
-    Get profile icon file path from Local State, or generate an avatar
+    digest = hashlib.blake2s(applescript.encode()).hexdigest()
+    script_path = os.path.join(Tools.getCacheDir(), f"tabs_{digest}.scpt")
+    if os.path.isfile(script_path):
+        return script_path
+
+    # osacompile picks the output format by extension
+    tmp_path = f"{script_path}.{os.getpid()}.tmp.scpt"
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            "osacompile",
+            "-o",
+            tmp_path,
+            "-e",
+            applescript,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        try:
+            returncode = await asyncio.wait_for(proc.wait(), timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise
+        if returncode == 0:
+            os.replace(tmp_path, script_path)
+            return script_path
+    except (asyncio.TimeoutError, OSError) as e:
+        Tools.log(f"Error compiling AppleScript: {e}")
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    return None
+
+
+async def run_osascript(applescript: str, timeout: int = 10) -> str:
+    """
+    Run an AppleScript in its own osascript process without blocking other scripts,
+    from its compiled copy if available
 
     Args:
-        browser_path (str): Base browser path
-        profile_dir (str): Profile directory name (Default, Profile 1, etc.)
-        profile_name (str): Profile display name (used for avatar generation)
+        applescript (str): AppleScript source
+        timeout (int, optional): Seconds until osascript is killed. Defaults to 10.
 
     Returns:
-        str: Profile icon file path or None if not found
+        str: stdout of osascript or empty string if it failed
     """
+    script_path = await compile_applescript(applescript, timeout)
+    args = [script_path] if script_path else ["-e", applescript]
+    proc = await asyncio.create_subprocess_exec(
+        "osascript",
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
     try:
-        local_state_path = os.path.join(browser_path, "Local State")
-        if os.path.isfile(local_state_path):
-            with open(local_state_path, "r", encoding="utf-8") as f:
-                local_state = json.load(f)
-
-            profiles = local_state.get("profile", {}).get("info_cache", {})
-            if profile_dir in profiles:
-                profile_info = profiles[profile_dir]
-                picture_filename = profile_info.get("gaia_picture_file_name")
-                if picture_filename:
-                    # Profile pictures are stored in the profile directory
-                    profile_picture_path = os.path.join(
-                        browser_path, profile_dir, picture_filename
-                    )
-                    if os.path.isfile(profile_picture_path):
-                        return profile_picture_path
-
-                # No profile picture found, generate an avatar
-                if profile_name:
-                    cache_dir = Tools.getCacheDir()
-                    avatar_path = get_or_create_avatar(profile_name, profile_dir, cache_dir)
-                    return avatar_path
-    except (json.JSONDecodeError, KeyError, FileNotFoundError) as e:
-        Tools.log(f"Error reading profile icon: {e}")
+        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise
+    return stdout.decode("utf-8") if proc.returncode == 0 else ""
 
-    return None
 
-
-def get_chromium_based_tabs(
+async def get_chromium_based_tabs(
     app_name: str, browser_name: str
 ) -> List[Tuple[str, str, str, str]]:
     """
@@ -107,13 +129,17 @@ def get_chromium_based_tabs(
         tell application "{app_name}"
             if it is running then
                 set tabInfo to ""
-                set windowIndex to 0
-                repeat with w in windows
-                    set windowIndex to windowIndex + 1
-                    set tabIndex to 0
-                    repeat with t in tabs of w
-                        set tabIndex to tabIndex + 1
-                        set tabInfo to tabInfo & (title of t) & "|||" & (URL of t) & "|||" & windowIndex & "|||" & tabIndex & "\\n"
+                -- ASCII unit and record separators can't appear in titles or URLs
+                set US to character id 31
+                set RS to character id 30
+                -- Fetch each property of all tabs with one Apple event
+                set allTitles to title of every tab of every window
+                set allURLs to URL of every tab of every window
+                repeat with windowIndex from 1 to count of allTitles
+                    set tabTitles to item windowIndex of allTitles
+                    set tabURLs to item windowIndex of allURLs
+                    repeat with tabIndex from 1 to count of tabTitles
+                        set tabInfo to tabInfo & (item tabIndex of tabTitles) & US & (item tabIndex of tabURLs) & US & windowIndex & US & tabIndex & RS
                     end repeat
                 end repeat
                 return tabInfo
@@ -121,27 +147,23 @@ def get_chromium_based_tabs(
         end tell
         """
 
-        result = subprocess.run(
-            ["osascript", "-e", applescript], capture_output=True, text=True, timeout=10
-        )
+        stdout = await run_osascript(applescript)
+
+        # osascript ends its output with a newline
+        for tab_line in stdout.rstrip("\n").split("\x1e"):
+            parts = tab_line.split("\x1f")
+            if len(parts) == 4:
+                title, url, window_idx, tab_idx = parts
+                tab_id = f"{app_name}:{window_idx}:{tab_idx}"
+                tabs.append((title, url, browser_name, tab_id))
 
-        if result.returncode == 0 and result.stdout.strip():
-            tab_data = result.stdout.strip().split("\n")
-            for tab_line in tab_data:
-                if "|||" in tab_line:
-                    parts = tab_line.split("|||")
-                    if len(parts) == 4:
-                        title, url, window_idx, tab_idx = parts
-                        tab_id = f"{app_name}:{window_idx}:{tab_idx}"
-                        tabs.append((title.strip(), url.strip(), browser_name, tab_id))
-
-    except (subprocess.TimeoutExpired, subprocess.CalledProcessError, Exception) as e:
+    except (asyncio.TimeoutError, OSError, Exception) as e:
         Tools.log(f"{browser_name} tabs error: {e}")
 
     return tabs
 
 
-def get_safari_tabs() -> List[Tuple[str, str, str, str]]:
+async def get_safari_tabs() -> List[Tuple[str, str, str, str]]:
     """
     Get open tabs from Safari browser.
 
@@ -155,13 +177,17 @@ def get_safari_tabs() -> List[Tuple[str, str, str, str]]:
         tell application "Safari"
             if it is running then
                 set tabInfo to ""
-                set windowIndex to 0
-                repeat with w in windows
-                    set windowIndex to windowIndex + 1
-                    set tabIndex to 0
-                    repeat with t in tabs of w
-                        set tabIndex to tabIndex + 1
-                        set tabInfo to tabInfo & (name of t) & "|||" & (URL of t) & "|||" & windowIndex & "|||" & tabIndex & "\\n"
+                -- ASCII unit and record separators can't appear in titles or URLs
+                set US to character id 31
+                set RS to character id 30
+                -- Fetch each property of all tabs with one Apple event
+                set allTitles to name of every tab of every window
+                set allURLs to URL of every tab of every window
+                repeat with windowIndex from 1 to count of allTitles
+                    set tabTitles to item windowIndex of allTitles
+                    set tabURLs to item windowIndex of allURLs
+                    repeat with tabIndex from 1 to count of tabTitles
+                        set tabInfo to tabInfo & (item tabIndex of tabTitles) & US & (item tabIndex of tabURLs) & US & windowIndex & US & tabIndex & RS
                     end repeat
                 end repeat
                 return tabInfo
@@ -169,49 +195,69 @@ def get_safari_tabs() -> List[Tuple[str, str, str, str]]:
         end tell
         """
 
-        result = subprocess.run(
-            ["osascript", "-e", applescript], capture_output=True, text=True, timeout=10
-        )
+        stdout = await run_osascript(applescript)
+
+        # osascript ends its output with a newline
+        for tab_line in stdout.rstrip("\n").split("\x1e"):
+            parts = tab_line.split("\x1f")
+            if len(parts) == 4:
+                title, url, window_idx, tab_idx = parts
+                tab_id = f"Safari:{window_idx}:{tab_idx}"
+                tabs.append((title, url, "Safari", tab_id))
 
-        if result.returncode == 0 and result.stdout.strip():
-            tab_data = result.stdout.strip().split("\n")
-            for tab_line in tab_data:
-                if "|||" in tab_line:
-                    parts = tab_line.split("|||")
-                    if len(parts) == 4:
-                        title, url, window_idx, tab_idx = parts
-                        tab_id = f"Safari:{window_idx}:{tab_idx}"
-                        tabs.append((title.strip(), url.strip(), "Safari", tab_id))
-
-    except (subprocess.TimeoutExpired, subprocess.CalledProcessError, Exception) as e:
+    except (asyncio.TimeoutError, OSError, Exception) as e:
         Tools.log(f"Safari tabs error: {e}")
 
     return tabs
 
 
-def get_all_browser_tabs() -> List[Tuple[str, str, str, str, str, str]]:
+def get_all_browser_tabs(on_tabs=None) -> List[Tuple[str, str, str, str, str, str]]:
     """
     Get open tabs from all supported browsers with profile information.
 
+    Args:
+        on_tabs (callable, optional): Called with the (title, url, browser_name, tab_id) tuples
+            of each browser as soon as that browser is enumerated
+
     Returns:
         List[Tuple[str, str, str, str, str, str]]: List of tuples in format (title, url, browser_name, tab_id, profile_name, profile_icon_path)
     """
     all_tabs = []
-    user_dir = os.path.expanduser("~")
 
     # Check Chromium-based browsers using centralized config
     enabled_browsers = get_enabled_browsers(Tools.getEnvBool)
-    for browser_key, config in enabled_browsers:
-        if config.is_chromium_based:
-            profile_tabs = get_chromium_based_tabs(config.app_name, config.display_name)
-            # Add default profile info to each tab for now
-            for title, url, browser_name, tab_id in profile_tabs:
-                all_tabs.append((title, url, browser_name, tab_id, "Default", None))
-
+    # Only ask browsers that are running, starting osascript is the expensive part
+    running = get_running_apps()
+    chromium_configs = [
+        config
+        for _, config in enabled_browsers
+        if config.is_chromium_based and (running is None or config.app_name in running)
+    ]
     # Check Safari separately (different AppleScript syntax)
-    if Tools.getEnvBool("safari"):
-        safari_tabs = get_safari_tabs()
-        for title, url, browser_name, tab_id in safari_tabs:
+    with_safari = Tools.getEnvBool("safari") and (running is None or "Safari" in running)
+
+    async def gather_tabs() -> list:
+        # All osascript processes run at the same time, the slowest browser sets the pace
+        jobs = [get_chromium_based_tabs(c.app_name, c.display_name) for c in chromium_configs]
+        if with_safari:
+            jobs.append(get_safari_tabs())
+        return await asyncio.gather(*(report_tabs(job) for job in jobs))
+
+    async def report_tabs(job) -> list:
+        tabs = await job
+        if on_tabs and tabs:
+            on_tabs(tabs)
+        return tabs
+
+    results = asyncio.run(gather_tabs())
+
+    for profile_tabs in results[: len(chromium_configs)]:
+        # Add default profile info to each tab for now
+        for title, url, browser_name, tab_id in profile_tabs:
+            all_tabs.append((title, url, browser_name, tab_id, "Default", None))
+
+    if with_safari:
+        for title, url, browser_name, tab_id in results[-1]:
             all_tabs.append((title, url, browser_name, tab_id, "Safari", None))
 
     return all_tabs
@@ -219,19 +265,34 @@ def get_all_browser_tabs() -> List[Tuple[str, str, str, str, str, str]]:
 
 def main():
     """Main function"""
-    # Log Python version
-    Tools.log("PYTHON VERSION:", sys.version)
-
-    # Check Python 3.7 or higher
-    if sys.version_info < (3, 7):
-        Tools.log("Python version 3.7.0 or higher required!")
-        sys.exit(0)
-
     # Create Alfred workflow item object
     wf = Items()
 
-    # Get all browser tabs
-    all_tabs = get_all_browser_tabs()
+    # Cache favicons (optional) of each browser while the other browsers are still enumerated
+    icon_jobs = []
+    on_tabs = None
+    if show_favicon:
+        # Imported only when favicons are shown
+        import multiprocessing
+
+        from Favicon import Icons
+
+        # One pool downloads favicons of all browsers, Icons would start a pool per call
+        icon_pool = multiprocessing.Pool()
+        icon_executor = ThreadPoolExecutor()
+
+        def on_tabs(tabs: list) -> None:
+            icon_jobs.append(icon_executor.submit(Icons, tabs, 1, icon_pool))
+
+    try:
+        # Get all browser tabs
+        all_tabs = get_all_browser_tabs(on_tabs)
+        # Wait for every download before looking up paths, browsers may share domains
+        icon_results = [job.result() for job in icon_jobs]
+    finally:
+        if show_favicon:
+            icon_executor.shutdown()
+            icon_pool.close()
 
     if len(all_tabs) == 0:
         wf.setItem(
@@ -243,21 +304,28 @@ def main():
         wf.write()
         sys.exit(0)
 
-    # Cache favicons (optional)
     if show_favicon:
-        ico_matches = [(url, title) for title, url, _, _, _, _ in all_tabs]
-        ico = Icons(ico_matches)
+        favicons = dict()
+        for icons in icon_results:
+            favicons.update(icons.as_dict())
+
+    # Subtitle prefix per (browser_name, profile_name), tabs of a profile share it
+    browser_infos = dict()
 
     # Generate results for all tabs (Alfred will handle filtering)
     for title, url, browser_name, tab_id, profile_name, profile_icon_path in all_tabs:
-        display_title = title if title else url.split("/")[2] if "/" in url else url
+        # Host as title, split stops after it instead of splitting the whole path
+        display_title = title or (url.split("/", 3)[2] if "://" in url else url)
         subtitle = f"{url[:80]}..." if len(url) > 80 else url
 
-        # Include profile name in subtitle if it's not Default
-        if profile_name and profile_name != "Default":
-            browser_info = f"[{browser_name} - {profile_name}]"
-        else:
-            browser_info = f"[{browser_name}]"
+        browser_info = browser_infos.get((browser_name, profile_name))
+        if browser_info is None:
+            # Include profile name in subtitle if it's not Default
+            if profile_name and profile_name != "Default":
+                browser_info = f"[{browser_name} - {profile_name}]"
+            else:
+                browser_info = f"[{browser_name}]"
+            browser_infos[(browser_name, profile_name)] = browser_info
 
         wf.setItem(
             title=display_title,
@@ -267,7 +335,7 @@ def main():
         )
 
         if show_favicon:
-            favicon = ico.get_favion_path(url)
+            favicon = favicons.get(url)
             if favicon:
                 wf.setIcon(favicon, "image")
             else:
@@ -0,0 +1,122 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+import json
+import os
+from functools import lru_cache
+
+from Alfred3 import Tools
+
+# Use the fastest available JSON parser, stdlib json as fallback
+try:
+    import orjson
+
+    loads = orjson.loads
+except ImportError:
+    try:
+        import ujson
+
+        loads = ujson.loads
+    except ImportError:
+        loads = json.loads
+
+
+def profile_dirs(base_path: str) -> list:
+    """
+    Get Default and Profile* directories of a Chromium browser in one directory read
+
+    Args:
+        base_path (str): Base browser path
+
+    Returns:
+        list: os.DirEntry objects of the profile directories, sorted by name
+    """
+    with os.scandir(base_path) as it:
+        entries = [
+            e
+            for e in it
+            if (e.name == "Default" or e.name.startswith("Profile"))
+            and e.is_dir(follow_symlinks=False)
+        ]
+    return sorted(entries, key=lambda e: e.name)
+
+
+def profiles_info(browser_path: str) -> dict:
+    """
+    Read profiles of a Chromium browser from its Local State file,
+    parsed again only if the file changed
+
+    Args:
+        browser_path (str): Base browser path
+
+    Returns:
+        dict: {profile_dir: {"user_name": real name, "icon_path": profile picture path or None}},
+            empty if Local State is not available
+    """
+    try:
+        mtime_ns = os.stat(os.path.join(browser_path, "Local State")).st_mtime_ns
+    except OSError:
+        return {}
+    return _parse_profiles_info(browser_path, mtime_ns)
+
+
+@lru_cache(maxsize=32)
+def _parse_profiles_info(browser_path: str, mtime_ns: int) -> dict:
+    """
+    Parse profiles from Local State, cached per file version
+
+    Args:
+        browser_path (str): Base browser path
+        mtime_ns (int): Modification time of Local State, part of the cache key
+
+    Returns:
+        dict: see profiles_info
+    """
+    try:
+        with open(os.path.join(browser_path, "Local State"), "rb") as f:
+            local_state = loads(f.read())
+        info_cache = local_state.get("profile", {}).get("info_cache", {})
+    except FileNotFoundError:
+        return {}
+    except (ValueError, AttributeError) as e:
+        Tools.log(f"Error reading Local State of {browser_path}: {e}")
+        return {}
+
+    profiles = dict()
+    for profile_dir, profile_data in info_cache.items():
+        # Try 'name' field first, then 'user_name' - different Chromium browsers use different fields
+        real_name = profile_data.get("name") or profile_data.get("user_name") or profile_dir
+
+        # Profile pictures are stored in the profile directory
+        icon_path = None
+        picture_filename = profile_data.get("gaia_picture_file_name")
+        if picture_filename:
+            profile_picture_path = os.path.join(browser_path, profile_dir, picture_filename)
+            if os.path.isfile(profile_picture_path):
+                icon_path = profile_picture_path
+
+        profiles[profile_dir] = {"user_name": real_name, "icon_path": icon_path}
+    return profiles
+
+
+def get_profile_info(browser_path: str, profile_dir: str) -> tuple:
+    """
+    Get real profile name and icon from Local State in one lookup, generating an avatar
+    if the profile has no picture
+
+    Args:
+        browser_path (str): Base browser path
+        profile_dir (str): Profile directory name (Default, Profile 1, etc.)
+
+    Returns:
+        tuple: (real name or directory name, icon path or None)
+    """
+    profile = profiles_info(browser_path).get(profile_dir)
+    if profile is None:
+        return profile_dir, None
+    real_name, icon_path = profile["user_name"], profile["icon_path"]
+    if not icon_path and real_name:
+        # Only needed for profiles without a picture, skip importing it otherwise
+        from avatar_generator import get_or_create_avatar
+
+        icon_path = get_or_create_avatar(real_name, profile_dir, Tools.getCacheDir())
+    return real_name, icon_path
@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 # -*- coding: utf-8 -*-
 import os
+import re
 import subprocess
 import sys
 from Alfred3 import Tools as Tools
@@ -115,6 +116,38 @@ def try_chrome_profile_switch(app_name: str, profile_dir: str):
         return False
 
 
+def get_profile_process_lines(profile_dir: str):
+    """
+    Get command lines of processes started with the given profile directory.
+
+    Args:
+        profile_dir: Profile directory name
+
+    Returns:
+        list: Matching process lines, or None if processes could not be listed
+    """
+    flag = f"--profile-directory={profile_dir}"
+    try:
+        # pgrep filters the process table itself, -l with -f prints full command lines on macOS
+        result = subprocess.run(
+            ["pgrep", "-lf", "--", re.sub(r"([][.^$*+?(){}|\\])", r"\\\1", flag)],
+            capture_output=True,
+            text=True,
+            timeout=2,
+        )
+        # Exit status 1 means no process matched
+        if result.returncode in (0, 1):
+            return result.stdout.splitlines()
+    except FileNotFoundError:
+        pass
+
+    # Fallback to scanning the full process table
+    result = subprocess.run(["ps", "aux"], capture_output=True, text=True, timeout=5)
+    if result.returncode == 0:
+        return result.stdout.split("\n")
+    return None
+
+
 def check_profile_by_process(app_name: str, profile_dir: str):
     """
     Check if a specific profile is running by examining process arguments.
@@ -127,13 +160,10 @@ def check_profile_by_process(app_name: str, profile_dir: str):
         bool: True if profile process found and activated, False otherwise
     """
     try:
-        # Use ps to find browser processes with specific profile directory
-        result = subprocess.run(
-            ["ps", "aux"], capture_output=True, text=True, timeout=5
-        )
+        # Find browser processes with specific profile directory
+        lines = get_profile_process_lines(profile_dir)
 
-        if result.returncode == 0:
-            lines = result.stdout.split("\n")
+        if lines is not None:
             profile_found = False
 
             for line in lines:
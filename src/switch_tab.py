@@ -22,16 +22,13 @@ def switch_to_tab(tab_id: str):
         app_name, window_idx, tab_idx = parts
 
         # Create AppleScript to switch to the tab and bring window to front
+        # Refer to the window by id, its index changes once it is raised
         applescript = f"""
         tell application "{app_name}"
             activate
-            tell window {window_idx}
-                set index to 1
-            end tell
-            delay 0.1
-            tell window 1
-                set active tab index to {tab_idx}
-            end tell
+            set w to window id (id of window {window_idx})
+            set active tab index of w to {tab_idx}
+            set index of w to 1
         end tell
         """
 